@@ -0,0 +1,266 @@
+# bench.py
+"""Offline benchmarks and parity checks for the tuner's pitch pipeline.
+
+    python bench.py kernels      # NumPy vs compiled autocorrelation kernel
+    python bench.py lean         # float64 vs lean float32 pipeline: time, peak memory
+    python bench.py decimate     # full-rate vs decimated detectors: time, cents drift
+    python bench.py parallel     # serial vs thread-pool fan-out: latency, identical results
+    python bench.py search       # catalog index: incremental build + query latency
+    python bench.py targeted     # open search vs manual-mode narrowband detector
+
+Signals are synthetic plucked notes, so no audio files or microphone needed.
+Exits non-zero when a parity check fails.
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+import server
+import pitch_kernels
+import catalog_search
+
+def synth_pluck(freq: float, duration: float = 2.0, sr: int = server.SAMPLE_RATE,
+                cents: float = 0.0, noise: float = 0.01, seed: int = 0) -> np.ndarray:
+    """Decaying harmonic tone resembling a plucked string"""
+    rng = np.random.default_rng(seed)
+    f0 = freq * 2 ** (cents / 1200)
+    t = np.arange(int(duration * sr)) / sr
+    tone = sum((0.6 ** (h - 1)) * np.sin(2 * np.pi * f0 * h * t + rng.uniform(0, 2 * np.pi))
+               for h in range(1, 7))
+    audio = tone * np.exp(-1.5 * t) + noise * rng.standard_normal(len(t))
+    return (0.8 * audio / np.max(np.abs(audio))).astype(np.float32)
+
+def test_signals(duration: float = 2.0):
+    """(label, audio) for every open string, slightly detuned, plus silence"""
+    sigs = [(f"{n}{c:+d}c", synth_pluck(f, duration, cents=c, seed=i))
+            for i, (n, f) in enumerate(server.GUITAR_NOTES.items())
+            for c in (-12, 0, 7)]
+    sigs.append(("silence", np.zeros(int(duration * server.SAMPLE_RATE), dtype=np.float32)))
+    return sigs
+
+def timeit(fn, repeat: int) -> float:
+    """Best-of-`repeat` wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+# ───── kernels ───────────────────────────────────────────────
+KERNEL_METHODS = ("enhanced_autocorrelation",)
+
+def bench_kernels(args) -> int:
+    if not pitch_kernels.HAVE_NUMBA:
+        print("numba is not installed; only the NumPy backend is available.")
+        return 0
+    ref = server.EnhancedPitchDetector(server.SAMPLE_RATE, backend="numpy")
+    fast = server.EnhancedPitchDetector(server.SAMPLE_RATE, backend="numba")
+    # segments the way analyze_pitch_enhanced sees them
+    signals = [(label, server.preprocess(a)[: int(args.seconds * server.SAMPLE_RATE)])
+               for label, a in test_signals()]
+    for m in KERNEL_METHODS:  # JIT warm-up
+        getattr(fast, m)(signals[0][1])
+
+    failures = 0
+    print(f"{'method':28s} {'numpy ms':>10s} {'numba ms':>10s} {'speedup':>8s}")
+    for m in KERNEL_METHODS:
+        t_ref = t_fast = 0.0
+        for label, audio in signals:
+            f_r, c_r = getattr(ref, m)(audio)
+            f_f, c_f = getattr(fast, m)(audio)
+            if abs(f_r - f_f) > args.tol * max(1.0, f_r) or abs(c_r - c_f) > args.tol:
+                failures += 1
+                print(f"  PARITY {m} {label}: numpy=({f_r:.6f}, {c_r:.6f}) "
+                      f"numba=({f_f:.6f}, {c_f:.6f})")
+            t_ref += timeit(lambda: getattr(ref, m)(audio), args.repeat)
+            t_fast += timeit(lambda: getattr(fast, m)(audio), args.repeat)
+        n = len(signals)
+        print(f"{m:28s} {t_ref / n:10.3f} {t_fast / n:10.3f} {t_ref / max(t_fast, 1e-9):7.1f}x")
+    print("parity: OK" if not failures else f"parity: {failures} mismatches")
+    return 1 if failures else 0
+
+# ───── lean pipeline ─────────────────────────────────────────
+def traced_peak(fn) -> int:
+    """Peak bytes traced while running fn()"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_lean(args) -> int:
+    failures = 0
+    print(f"{'signal':10s} {'f64 Hz':>9s} {'lean Hz':>9s} {'f64 ms':>8s} {'lean ms':>8s} "
+          f"{'f64 peak':>10s} {'lean peak':>10s}")
+    for label, audio in test_signals(args.seconds):
+        f_ref, _, _ = server.analyze_pitch_enhanced(audio.astype(np.float64))
+        f_lean, _, _ = server.analyze_pitch_enhanced(audio.copy(), lean=True)
+        cents = 1200 * abs(np.log2(f_lean / f_ref)) if f_ref > 0 and f_lean > 0 else 0.0
+        if (f_ref > 0) != (f_lean > 0) or cents > args.max_cents:
+            failures += 1
+        t_ref = timeit(lambda: server.analyze_pitch_enhanced(audio.astype(np.float64)), args.repeat)
+        t_lean = timeit(lambda: server.analyze_pitch_enhanced(audio.copy(), lean=True), args.repeat)
+        m_ref = traced_peak(lambda: server.analyze_pitch_enhanced(audio.astype(np.float64)))
+        m_lean = traced_peak(lambda: server.analyze_pitch_enhanced(audio.copy(), lean=True))
+        print(f"{label:10s} {f_ref:9.2f} {f_lean:9.2f} {t_ref:8.1f} {t_lean:8.1f} "
+              f"{m_ref / 1e6:9.2f}M {m_lean / 1e6:9.2f}M")
+    print(f"scratch pool: {server.scratch_pool().stats()}")
+    print("accuracy: OK" if not failures else f"accuracy: {failures} signals off by > {args.max_cents}c")
+    return 1 if failures else 0
+
+# ───── decimated analysis ────────────────────────────────────
+def bench_decimate(args) -> int:
+    worst = 0.0
+    mismatched = 0
+    print(f"{'signal':10s} {'full Hz':>9s} {'dec Hz':>9s} {'Δcents':>7s} {'full ms':>8s} {'dec ms':>8s}")
+    for label, audio in test_signals(args.seconds):
+        audio = audio.astype(np.float64)
+        f_full, _, _ = server.analyze_pitch_enhanced(audio)
+        f_dec, _, _ = server.analyze_pitch_enhanced(audio, decimation=args.factor)
+        if (f_full > 0) != (f_dec > 0):
+            mismatched += 1
+        drift = 1200 * abs(np.log2(f_dec / f_full)) if f_full > 0 and f_dec > 0 else 0.0
+        worst = max(worst, drift)
+        t_full = timeit(lambda: server.analyze_pitch_enhanced(audio), args.repeat)
+        t_dec = timeit(lambda: server.analyze_pitch_enhanced(audio, decimation=args.factor), args.repeat)
+        print(f"{label:10s} {f_full:9.2f} {f_dec:9.2f} {drift:7.2f} {t_full:8.1f} {t_dec:8.1f}")
+    print(f"analysis rate {server.SAMPLE_RATE / args.factor:.1f}Hz, worst drift {worst:.2f} cents, "
+          f"{mismatched} detection mismatches")
+    return 1 if mismatched or worst > args.max_cents else 0
+
+# ───── intra-request parallelism ─────────────────────────────
+def bench_parallel(args) -> int:
+    mismatches = 0
+    frame = int(server.TRACK_WINDOW * server.SAMPLE_RATE)
+    detector = server.EnhancedPitchDetector(server.SAMPLE_RATE)
+    rows = []
+    for label, audio in test_signals(args.seconds):
+        audio = audio.astype(np.float64)
+        ref = server.analyze_pitch_enhanced(audio)
+        par = server.analyze_pitch_enhanced(audio, parallelism=args.threads)
+        clip = server.preprocess(audio)[:frame]
+        if ref != par or detector.detect(clip) != detector.detect(clip, args.threads):
+            mismatches += 1
+        rows.append((
+            label,
+            timeit(lambda: server.analyze_pitch_enhanced(audio), args.repeat),
+            timeit(lambda: server.analyze_pitch_enhanced(audio, parallelism=args.threads), args.repeat),
+            timeit(lambda: detector.detect(clip), args.repeat),
+            timeit(lambda: detector.detect(clip, args.threads), args.repeat),
+        ))
+    print(f"{'signal':10s} {'tune ser':>9s} {'tune par':>9s} {'frame ser':>10s} {'frame par':>10s}  (ms)")
+    for label, *times in rows:
+        print(f"{label:10s} {times[0]:9.1f} {times[1]:9.1f} {times[2]:10.2f} {times[3]:10.2f}")
+    tot = np.sum([r[1:] for r in rows], axis=0)
+    print(f"speedup with {args.threads} threads: /tune {tot[0] / tot[1]:.2f}x, "
+          f"/track frame {tot[2] / tot[3]:.2f}x")
+    print("results: identical" if not mismatches else f"results: {mismatches} differ")
+    return 1 if mismatches else 0
+
+# ───── catalog search ────────────────────────────────────────
+SEARCH_WORDS = ("guitar chord scale strum picking fingerstyle blues rock jazz folk "
+                "rhythm lead riff solo major minor pentatonic barre capo tuning theory "
+                "ear training beginner intermediate advanced warmup technique timing").split()
+
+def bench_search(args) -> int:
+    rng = np.random.default_rng(0)
+    index = catalog_search.CatalogIndex()
+    words = lambda k: " ".join(rng.choice(SEARCH_WORDS, k))
+    t0 = time.perf_counter()
+    for cid in range(1, args.courses + 1):
+        index.add_course({"id": cid, "name": f"{words(2)} course {cid}", "description": words(12)})
+    for lid in range(1, args.lessons + 1):
+        index.add_lesson({"id": lid, "course_id": int(rng.integers(1, args.courses + 1)),
+                          "title": f"{words(3)} lesson {lid}", "description": words(20)})
+    build_s = time.perf_counter() - t0
+    print(f"indexed {args.courses} courses + {args.lessons} lessons in {build_s:.1f}s "
+          f"({build_s / (args.courses + args.lessons) * 1e6:.0f}µs per add)")
+    queries = ["blues", "pent", "barre chord", "jazz scale beginner", "fingerst tech", "lesson 4242"]
+    for q in queries:
+        ms = timeit(lambda: index.search(q, limit=20), args.repeat)
+        hits = index.search(q, limit=3)
+        print(f"{q!r:24s} {ms:8.2f} ms  top: {[h.get('name') or h.get('title') for h in hits]}")
+    return 0
+
+# ───── targeted (manual-mode) detection ──────────────────────
+def bench_targeted(args) -> int:
+    worst = 0.0
+    misses = 0
+    t_open = t_target = 0.0
+    print(f"{'signal':10s} {'true Hz':>9s} {'open Hz':>9s} {'target Hz':>10s} {'err c':>6s} "
+          f"{'open ms':>8s} {'target ms':>10s}")
+    for i, (note, f0) in enumerate(server.GUITAR_NOTES.items()):
+        for cents in (-150, -20, 0, 9, 80):
+            truth = f0 * 2 ** (cents / 1200)
+            audio = synth_pluck(f0, args.seconds, cents=cents, seed=i).astype(np.float64)
+            f_open, _, _ = server.analyze_pitch_enhanced(audio)
+            f_tgt, _, _ = server.analyze_pitch_targeted(audio, f0)
+            err = 1200 * abs(np.log2(f_tgt / truth)) if f_tgt > 0 else float("inf")
+            worst = max(worst, err)
+            misses += err > args.max_cents
+            a = timeit(lambda: server.analyze_pitch_enhanced(audio), args.repeat)
+            b = timeit(lambda: server.analyze_pitch_targeted(audio, f0), args.repeat)
+            t_open += a
+            t_target += b
+            print(f"{note}{cents:+d}c".ljust(10) + f" {truth:9.2f} {f_open:9.2f} {f_tgt:10.2f} "
+                  f"{err:6.2f} {a:8.1f} {b:10.1f}")
+    print(f"targeted is {t_open / max(t_target, 1e-9):.1f}x cheaper; worst error {worst:.2f} cents, "
+          f"{misses} above {args.max_cents}c")
+    # neighbouring string played: the answer must come from outside the search window
+    names = list(server.GUITAR_NOTES)
+    edge = 0
+    for sel, played in list(zip(names, names[1:])) + list(zip(names[1:], names)):
+        audio = synth_pluck(server.GUITAR_NOTES[played], args.seconds, seed=1).astype(np.float64)
+        f_tgt, _, _ = server.analyze_pitch_targeted(audio, server.GUITAR_NOTES[sel])
+        off = 1200 * np.log2(f_tgt / server.GUITAR_NOTES[sel]) if f_tgt > 0 else float("inf")
+        inside = abs(off) <= server.TARGET_SEARCH_CENTS
+        edge += inside
+        shown = f"{f_tgt:7.2f} Hz ({off:+.0f}c)" if f_tgt > 0 else "no pitch"
+        print(f"{sel} selected, {played} played: {shown}{'  INSIDE WINDOW' if inside else ''}")
+    print(f"{edge} wrong-string clips reported inside the ±{server.TARGET_SEARCH_CENTS:g}c window")
+    return 1 if misses or edge else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    k = sub.add_parser("kernels", help="NumPy vs compiled detector kernels")
+    k.add_argument("--seconds", type=float, default=0.4, help="segment length analysed")
+    k.add_argument("--repeat", type=int, default=5)
+    k.add_argument("--tol", type=float, default=1e-9, help="relative parity tolerance")
+    k.set_defaults(func=bench_kernels)
+    l = sub.add_parser("lean", help="float64 vs lean float32 pipeline")
+    l.add_argument("--seconds", type=float, default=2.0, help="clip length")
+    l.add_argument("--repeat", type=int, default=3)
+    l.add_argument("--max-cents", type=float, default=1.0, help="allowed float32 drift")
+    l.set_defaults(func=bench_lean)
+    d = sub.add_parser("decimate", help="full-rate vs decimated detectors")
+    d.add_argument("--factor", type=int, default=8, help="decimation factor (8 → 5512.5Hz)")
+    d.add_argument("--seconds", type=float, default=2.0, help="clip length")
+    d.add_argument("--repeat", type=int, default=3)
+    d.add_argument("--max-cents", type=float, default=2.0, help="allowed drift vs full rate")
+    d.set_defaults(func=bench_decimate)
+    p = sub.add_parser("parallel", help="serial vs thread-pool fan-out")
+    p.add_argument("--threads", type=int, default=4, help="per-request parallelism")
+    p.add_argument("--seconds", type=float, default=2.0, help="clip length")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_parallel)
+    c = sub.add_parser("search", help="catalog index build and query latency")
+    c.add_argument("--courses", type=int, default=2000)
+    c.add_argument("--lessons", type=int, default=100_000)
+    c.add_argument("--repeat", type=int, default=5)
+    c.set_defaults(func=bench_search)
+    t = sub.add_parser("targeted", help="open search vs manual-mode narrowband detector")
+    t.add_argument("--seconds", type=float, default=2.0, help="clip length")
+    t.add_argument("--repeat", type=int, default=3)
+    t.add_argument("--max-cents", type=float, default=1.0, help="allowed error vs true pitch")
+    t.set_defaults(func=bench_targeted)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
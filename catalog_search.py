@@ -0,0 +1,183 @@
+# catalog_search.py
+"""In-process inverted index over course names/descriptions and lesson
+titles/descriptions.
+
+Documents are added one at a time as they are created, so the index never
+needs a rebuild. Query tokens match indexed terms exactly or by prefix
+(exact matches score higher); results must match every query token and are
+ranked by field-weighted tf-idf.
+
+Postings are also kept impact-ordered (grouped by weight, highest first), so
+a query reads each token's best documents first and stops as soon as no
+unread document can beat the current top `limit` (a threshold-algorithm
+cut-off). A one-word or short-prefix query reads about `limit` documents
+however common the word; each extra word reads deeper, since a document's
+total then comes from several lists.
+"""
+import re
+import math
+import heapq
+import bisect
+import threading
+import unicodedata
+from operator import itemgetter
+from typing import Optional, Dict, Any, List, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+FIELD_WEIGHTS = {"title": 3.0, "description": 1.0}
+PREFIX_WEIGHT = 0.5      # a prefix match counts half an exact one
+MAX_EXPANSIONS = 64      # vocabulary terms one prefix may expand to
+
+DocKey = Tuple[str, int]   # ("course" | "lesson", id)
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase, strip accents, split on anything that is not a letter or digit"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return TOKEN_RE.findall(text)
+
+class CatalogIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings: Dict[str, Dict[DocKey, float]] = {}        # term → doc → weight
+        self.impacts: Dict[str, Dict[float, List[DocKey]]] = {}   # term → weight → docs
+        self.vocabulary: List[str] = []          # sorted, for prefix lookups
+        self.docs: Dict[DocKey, Dict[str, Any]] = {}
+        self.order: Dict[DocKey, int] = {}       # creation sequence, breaks score ties
+        self.by_course: Dict[int, List[DocKey]] = {}   # a course and its lessons
+
+    def _add(self, key: DocKey, course_id: int, fields: Dict[str, Optional[str]],
+             summary: Dict[str, Any]):
+        weights: Dict[str, float] = {}
+        for field, text in fields.items():
+            for tok in tokenize(text):
+                weights[tok] = weights.get(tok, 0.0) + FIELD_WEIGHTS[field]
+        with self.lock:
+            self.docs[key] = summary
+            self.order[key] = len(self.order)
+            self.by_course.setdefault(course_id, []).append(key)
+            for tok, w in weights.items():
+                posting = self.postings.get(tok)
+                if posting is None:
+                    posting = self.postings[tok] = {}
+                    self.impacts[tok] = {}
+                    bisect.insort(self.vocabulary, tok)
+                posting[key] = w
+                self.impacts[tok].setdefault(w, []).append(key)
+
+    def add_course(self, course: Dict[str, Any]):
+        self._add(("course", course["id"]), course["id"],
+                  {"title": course["name"], "description": course.get("description")},
+                  {"type": "course", "id": course["id"], "name": course["name"]})
+
+    def add_lesson(self, lesson: Dict[str, Any]):
+        self._add(("lesson", lesson["id"]), lesson["course_id"],
+                  {"title": lesson["title"], "description": lesson.get("description")},
+                  {"type": "lesson", "id": lesson["id"], "course_id": lesson["course_id"],
+                   "title": lesson["title"]})
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching `token`: itself (if present) plus prefix extensions"""
+        i = bisect.bisect_left(self.vocabulary, token)
+        terms = []
+        while i < len(self.vocabulary) and len(terms) < MAX_EXPANSIONS:
+            term = self.vocabulary[i]
+            if not term.startswith(token):
+                break
+            terms.append((term, 1.0 if term == token else PREFIX_WEIGHT))
+            i += 1
+        return terms
+
+    def _impact_order(self, terms: List[Tuple[str, float]]) -> List[Tuple[float, List[DocKey]]]:
+        """(token score, docs) buckets over all of a token's terms, highest score first"""
+        return sorted(((factor * w, keys) for term, factor in terms
+                       for w, keys in self.impacts[term].items()),
+                      key=itemgetter(0), reverse=True)
+
+    def search(self, query: str, limit: int = 20, doc_type: Optional[str] = None,
+               course_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self.lock:
+            n_docs = max(len(self.docs), 1)
+            # per token: (term, match weight * idf) for each matching term
+            expanded = []
+            for tok in tokens:
+                terms = [(t, w * math.log(1 + n_docs / len(self.postings[t])))
+                         for t, w in self._expand(tok)]
+                if not terms:
+                    return []
+                expanded.append(terms)
+            probes = [[(self.postings[t], factor) for t, factor in terms] for terms in expanded]
+
+            def token_score(j: int, key: DocKey) -> float:
+                terms = probes[j]
+                if len(terms) == 1:
+                    posting, factor = terms[0]
+                    return factor * posting.get(key, 0.0)
+                return max(factor * posting.get(key, 0.0) for posting, factor in terms)
+
+            # (score, -creation order, key): the heap root is the weakest of the top `limit`
+            top: List[Tuple[float, int, DocKey]] = []
+
+            def offer(key: DocKey, total: float):
+                entry = (total, -self.order[key], key)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+
+            if course_id is not None:
+                # a course has few documents; score them all
+                for key in self.by_course.get(course_id, ()):
+                    if doc_type and key[0] != doc_type:
+                        continue
+                    scores = [token_score(j, key) for j in range(len(probes))]
+                    if all(scores):
+                        offer(key, sum(scores))
+            else:
+                # threshold algorithm over impact-ordered buckets. levels[j] is the
+                # best score token j can still give a doc not read from its list yet,
+                # so no unread doc beats sum(levels); always read from the token with
+                # the highest level, and stop once the top `limit` reach that bound or
+                # one token's list is exhausted (every conjunctive match has been read)
+                buckets = [self._impact_order(terms) for terms in expanded]
+                levels = [b[0][0] for b in buckets]
+                pos = [0] * len(buckets)
+                seen = set()
+                while True:
+                    i = max(range(len(levels)), key=levels.__getitem__)
+                    level, keys = buckets[i][pos[i]]
+                    others = [j for j in range(len(levels)) if j != i]
+                    bound = sum(levels)
+                    for key in keys:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        if doc_type and key[0] != doc_type:
+                            continue
+                        weakest = top[0][0] if len(top) == limit else 0.0
+                        # an unseen doc scores `level` here and at most levels[j] elsewhere;
+                        # give up on it as soon as that bound falls below the weakest kept
+                        total, slack = level, bound - level
+                        for j in others:
+                            s = token_score(j, key)
+                            if s == 0:
+                                break
+                            total += s
+                            slack -= levels[j]
+                            if total + slack < weakest:
+                                break
+                        else:
+                            offer(key, total)
+                    pos[i] += 1
+                    if pos[i] == len(buckets[i]):
+                        break
+                    levels[i] = buckets[i][pos[i]][0]
+                    if len(top) == limit and top[0][0] >= sum(levels):
+                        break
+            ranked = sorted(top, reverse=True)
+            return [{**self.docs[key], "score": round(s, 3)} for s, _, key in ranked]
@@ -1,5 +1,13 @@
 # guitar_tuner.py
-import pyaudio
+import sys
+import os
+import io
+import csv
+import json
+import time
+import argparse
+import contextlib
+import multiprocessing
 import numpy as np
 import librosa
 
@@ -49,6 +57,7 @@ def get_closest_note(freq):
 
 def record_audio():
     """Record audio from microphone"""
+    import pyaudio  # only needed for live recording, not batch analysis
     p = pyaudio.PyAudio()
     stream = p.open(format=pyaudio.paInt16,
                     channels=1,
@@ -173,5 +182,113 @@ def main():
     except Exception as e:
         print(f"❌ Error: {e}")
 
+# ───── Batch (offline) analysis ───────────────────────────────
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3', '.m4a', '.aiff', '.aif', '.webm')
+BATCH_FIELDS = ['path', 'duration', 'frequency', 'note', 'target_frequency',
+                'cents', 'in_tune', 'error']
+
+def iter_audio_files(paths):
+    """Expand files and directories (recursively) into a sorted list of audio files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names
+                             if n.lower().endswith(AUDIO_EXTENSIONS))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️ Skipping missing path: {path}", file=sys.stderr)
+    return sorted(files)
+
+def analyze_file(path):
+    """Analyze one recorded clip; runs inside a worker process"""
+    result = dict.fromkeys(BATCH_FIELDS)
+    result['path'] = path
+    try:
+        # analyze_pitch/get_closest_note print diagnostics; keep stdout clean for output
+        with contextlib.redirect_stdout(io.StringIO()):
+            audio, _ = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+            result['duration'] = round(len(audio) / SAMPLE_RATE, 3)
+            if np.sqrt(np.mean(audio**2)) < 0.001:
+                result['error'] = 'audio too quiet'
+                return result
+            pitch = analyze_pitch(audio)
+            if pitch is None:
+                result['error'] = 'no note detected'
+                return result
+            note, cents, target_freq = get_closest_note(pitch)
+        if note is None:
+            result['error'] = 'frequency too low'
+            return result
+        result.update(
+            frequency=round(float(pitch), 2),
+            note=note,
+            target_frequency=target_freq,
+            cents=round(float(cents), 1),
+            in_tune=bool(abs(cents) <= ERROR_MARGIN),
+        )
+    except Exception as e:
+        # some decoder errors (e.g. audioread's NoBackendError) carry no message
+        result['error'] = str(e) or type(e).__name__
+    return result
+
+def run_batch(argv=None):
+    """Analyze recorded clips concurrently and stream results as JSON lines or CSV"""
+    parser = argparse.ArgumentParser(prog='guitar_tuner.py batch',
+                                     description='Offline batch pitch analysis of recorded clips')
+    parser.add_argument('paths', nargs='+', help='audio files or directories')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='emit results as they complete instead of in input order')
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help='files handed to a worker at a time')
+    args = parser.parse_args(argv)
+
+    files = iter_audio_files(args.paths)
+    if not files:
+        print("❌ No audio files found.", file=sys.stderr)
+        return 1
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writer = None
+    if args.format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=BATCH_FIELDS)
+        writer.writeheader()
+
+    workers = max(1, min(args.workers, len(files)))
+    print(f"🎸 Analyzing {len(files)} files with {workers} workers...", file=sys.stderr)
+    start = time.perf_counter()
+    done = failed = 0
+    audio_seconds = 0.0
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            mapper = pool.imap_unordered if args.unordered else pool.imap
+            for result in mapper(analyze_file, files, chunksize=max(1, args.chunksize)):
+                done += 1
+                audio_seconds += result['duration'] or 0.0
+                if result['error'] is not None:
+                    failed += 1
+                if writer:
+                    writer.writerow(result)
+                else:
+                    out.write(json.dumps(result) + '\n')
+    except KeyboardInterrupt:
+        print("\n👋 Batch stopped by user", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"✅ {done} files ({failed} without a note) in {elapsed:.1f}s — "
+          f"{done / elapsed:.1f} files/s, {audio_seconds / elapsed:.1f} audio-s/s",
+          file=sys.stderr)
+    return 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        sys.exit(run_batch(sys.argv[2:]))
     main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+# loadtest.py
+"""Offline load generator that mimics guitar_tuner.html auto-mode clients.
+
+Each simulated client uploads a 2s synthetic pluck to /tune every
+AUTO_TUNE_INTERVAL (3s, as in js/guitar_tuner.js), and now and then saves an
+onboarding step or lists instructor courses. Concurrency ramps through the
+given stages and throughput plus p50/p95/p99 latency are reported per stage;
+each stage starts with one untimed /tune so one-off warm-up stays out of it.
+The in-process mode shares one event loop with the app, i.e. it measures a
+single uvicorn worker; use --url to drive a multi-worker server.
+
+    python loadtest.py                               # in-process ASGI app
+    python loadtest.py --url http://127.0.0.1:8001   # a locally running server
+    python loadtest.py --stages 1,4,16,32 --stage-seconds 30 --json out.json
+"""
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+import httpx
+import soundfile as sf
+
+import server
+from bench import synth_pluck
+
+AUTO_TUNE_INTERVAL = 3.0   # seconds, js/guitar_tuner.js
+RECORDING_DURATION = 2.0   # seconds, js/guitar_tuner.js
+
+def make_clips(count: int, sr: int) -> list[bytes]:
+    """Pre-rendered WAV uploads so clip synthesis never shows up in latency"""
+    notes = list(server.GUITAR_NOTES.values())
+    clips = []
+    for i in range(count):
+        audio = synth_pluck(notes[i % len(notes)], RECORDING_DURATION, sr=sr,
+                            cents=random.uniform(-30, 30), noise=0.02, seed=i)
+        buf = io.BytesIO()
+        sf.write(buf, audio, sr, format="WAV", subtype="PCM_16")
+        clips.append(buf.getvalue())
+    return clips
+
+class Recorder:
+    """Latency samples and errors for one stage, keyed by endpoint"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def add(self, name: str, seconds: float, ok: bool):
+        self.samples.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        out = {}
+        for name, lat in sorted(self.samples.items()):
+            ms = np.array(lat) * 1000
+            out[name] = {
+                "requests": len(lat),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(lat) / elapsed, 2),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                "p99_ms": round(float(np.percentile(ms, 99)), 1),
+            }
+        return out
+
+def answered(resp: httpx.Response) -> bool:
+    """2xx, or the 400 "no clear pitch" that is a normal tuner answer. Auth
+    failures and 413/415 rejections are errors: they mean a misconfigured run"""
+    return resp.is_success or (resp.status_code == 400 and "No clear pitch" in resp.text)
+
+async def timed(client: httpx.AsyncClient, rec: Recorder, name: str, method: str, path: str, **kw):
+    t0 = time.perf_counter()
+    try:
+        ok = answered(await client.request(method, path, **kw))
+    except httpx.HTTPError:
+        ok = False
+    rec.add(name, time.perf_counter() - t0, ok)
+
+async def tuner_client(cid: int, client: httpx.AsyncClient, rec: Recorder, clips: list[bytes],
+                       args, stop_at: float):
+    rnd = random.Random(cid)
+    # users open the page at different moments
+    await asyncio.sleep(rnd.uniform(0, args.interval))
+    while time.perf_counter() < stop_at:
+        tick = time.perf_counter()
+        clip = clips[rnd.randrange(len(clips))]
+        await timed(client, rec, "tune", "POST", "/tune",
+                    files={"file": ("guitar_recording.wav", clip, "audio/wav")})
+        if rnd.random() < args.onboarding_rate:
+            await timed(client, rec, "onboarding", "POST", "/onboarding/save",
+                        json={"step": "loadtest", "data": {"client": cid}, "user_id": f"lt-{cid}"})
+        if rnd.random() < args.instructor_rate:
+            await timed(client, rec, "instructor", "GET", "/instructor/courses",
+                        headers={"X-Instructor-Token": args.instructor_token})
+        # setInterval semantics: next upload one interval after the last tick
+        await asyncio.sleep(max(0.0, args.interval - (time.perf_counter() - tick)))
+
+async def run_stage(concurrency: int, clips: list[bytes], args) -> dict:
+    if args.url:
+        transport, base = None, args.url
+    else:
+        transport, base = httpx.ASGITransport(app=server.app), "http://loadtest"
+    rec = Recorder()
+    async with httpx.AsyncClient(transport=transport, base_url=base, timeout=args.timeout) as client:
+        # untimed warm-up: the first /tune pays one-off costs (numba JIT compile,
+        # FFT plans) that would otherwise set the low-concurrency p99
+        await client.post("/tune", files={"file": ("guitar_recording.wav", clips[0], "audio/wav")})
+        start = time.perf_counter()
+        stop_at = start + args.stage_seconds
+        await asyncio.gather(*(tuner_client(i, client, rec, clips, args, stop_at)
+                               for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "elapsed_s": round(elapsed, 2),
+            "endpoints": rec.summary(elapsed)}
+
+def print_stage(stage: dict):
+    print(f"\n── {stage['concurrency']} clients, {stage['elapsed_s']}s ──")
+    print(f"{'endpoint':12s} {'reqs':>6s} {'err':>5s} {'rps':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for name, s in stage["endpoints"].items():
+        print(f"{name:12s} {s['requests']:6d} {s['errors']:5d} {s['rps']:7.2f} "
+              f"{s['p50_ms']:8.1f} {s['p95_ms']:8.1f} {s['p99_ms']:8.1f}")
+
+async def main_async(args) -> list[dict]:
+    random.seed(args.seed)
+    clips = make_clips(args.clips, args.sample_rate)
+    results = []
+    for concurrency in args.stages:
+        stage = await run_stage(concurrency, clips, args)
+        print_stage(stage)
+        results.append(stage)
+    return results
+
+def parse_stages(text: str) -> list[int]:
+    return [int(s) for s in text.split(",") if s.strip()]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="local server base URL (default: in-process ASGI app)")
+    parser.add_argument("--stages", type=parse_stages, default=[1, 2, 4, 8, 16],
+                        help="comma-separated client counts to ramp through")
+    parser.add_argument("--stage-seconds", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=AUTO_TUNE_INTERVAL,
+                        help="seconds between uploads per client")
+    parser.add_argument("--onboarding-rate", type=float, default=0.1,
+                        help="chance per tick of an /onboarding/save call")
+    parser.add_argument("--instructor-rate", type=float, default=0.05,
+                        help="chance per tick of an instructor course listing")
+    parser.add_argument("--instructor-token", default=server.INSTRUCTOR_TOKEN)
+    parser.add_argument("--clips", type=int, default=24, help="distinct WAV uploads")
+    parser.add_argument("--sample-rate", type=int, default=server.SAMPLE_RATE)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write stage results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
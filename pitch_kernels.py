@@ -0,0 +1,104 @@
+# pitch_kernels.py
+"""Fused inner loop for EnhancedPitchDetector's autocorrelation.
+
+np.correlate computes every lag of a full-length correlation; the kernel
+stops at the longest period of interest (sample_rate/70). Only this method
+has a kernel: HPS and cepstral time is dominated by their FFTs, and compiled
+post-FFT loops did not beat NumPy there. The kernel is compiled nogil so a
+parallel /tune's autocorrelation lanes overlap the other methods' FFTs instead
+of holding the GIL for their whole run. Numba is optional: when it is
+installed the kernel is JIT-compiled, otherwise server.py keeps using its
+NumPy implementation (the plain-Python kernel still runs, just slowly, which
+is handy for debugging parity).
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # optional dependency
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+BACKENDS = ("auto", "numba", "numpy")
+
+def resolve_backend(name: str = "auto") -> str:
+    """Map a requested backend to the one that will actually run"""
+    name = (name or "auto").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown pitch backend {name!r}, expected one of {BACKENDS}")
+    if name == "auto":
+        return "numba" if HAVE_NUMBA else "numpy"
+    if name == "numba" and not HAVE_NUMBA:
+        raise ValueError("PITCH_BACKEND=numba but numba is not installed")
+    return name
+
+@njit(cache=True, nogil=True)
+def _clamp01(x):
+    return max(0.0, min(1.0, x))
+
+@njit(cache=True, nogil=True)
+def autocorr_pitch(windowed, sample_rate):
+    """Autocorrelation peak search with parabolic interpolation.
+
+    Only lags up to sample_rate/70 (+1 for interpolation) are computed
+    instead of the full np.correlate output.
+    """
+    n = windowed.shape[0]
+    min_p = int(sample_rate / 400)
+    max_p = int(sample_rate / 70)
+    hi = min(max_p + 1, n)
+    if hi == 0:
+        return 0.0, 0.0
+    corr = np.empty(hi)
+    for lag in range(hi):
+        acc = 0.0
+        for i in range(n - lag):
+            acc += windowed[i] * windowed[i + lag]
+        corr[lag] = acc
+    if corr[0] == 0:
+        return 0.0, 0.0
+    c0 = corr[0]
+    for lag in range(hi):
+        corr[lag] = corr[lag] / c0
+
+    # first rising lag; look past the computed range only if none found yet
+    start = -1
+    for k in range(hi - 1):
+        if corr[k + 1] - corr[k] > 0:
+            start = k
+            break
+    if start < 0:
+        prev = corr[hi - 1]
+        for lag in range(hi, n):
+            acc = 0.0
+            for i in range(n - lag):
+                acc += windowed[i] * windowed[i + lag]
+            cur = acc / c0
+            if cur - prev > 0:
+                return 0.0, 0.0  # first rise is beyond max_p
+            prev = cur
+        start = 0
+    if start >= max_p:
+        return 0.0, 0.0
+
+    lo = max(start, min_p)
+    end = min(max_p, n)
+    if end <= lo:
+        return 0.0, 0.0
+    peak_idx = lo
+    for k in range(lo + 1, end):
+        if corr[k] > corr[peak_idx]:
+            peak_idx = k
+    if 1 <= peak_idx < n - 1:
+        y1 = corr[peak_idx - 1]
+        y2 = corr[peak_idx]
+        y3 = corr[peak_idx + 1]
+        denom = 2 * y2 - y1 - y3
+        x0 = (y3 - y1) / (2 * denom) if denom != 0 else 0.0
+        return sample_rate / (peak_idx + x0), _clamp01(y2)
+    return sample_rate / max(peak_idx, 1), _clamp01(corr[peak_idx])
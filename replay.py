@@ -0,0 +1,145 @@
+# replay.py
+"""Replay captured /tune traffic through decode → preprocess → analysis.
+
+Captures come from a server run with TUNE_CAPTURE_DIR set (see
+tune_capture.py). Every clip is pushed through the same stages /tune uses, as
+fast as possible, and the report shows per-stage timings plus any change in
+detected note or cents relative to a baseline: by default the result the
+capturing server returned, or a --baseline file written by an earlier
+replay (--out) on another build.
+
+    python replay.py captures/ --out new.jsonl
+    python replay.py captures/ --baseline old.jsonl --cents-tol 0.5
+"""
+import sys
+import json
+import time
+import argparse
+from typing import Optional
+import numpy as np
+
+import server
+import tune_capture
+
+STAGES = ("decode", "preprocess", "analyze")
+
+def replay_one(payload: bytes, args, note: Optional[str] = None) -> tuple[dict, dict]:
+    """Result dict and per-stage seconds for one captured upload. `note` is the
+    upload's note field: as in /tune it selects the targeted (manual-mode)
+    analysis, with cents against that string"""
+    selected_f = server.GUITAR_NOTES.get(note) if note else None
+    timings = {}
+    t0 = time.perf_counter()
+    audio, sr = server.decode_audio(payload, dtype="float32" if args.lean else "float64",
+                                    max_seconds=server.TUNE_ANALYSIS_WINDOW)
+    t1 = time.perf_counter()
+    if args.lean:
+        pool = server.scratch_pool()
+        pool.reserve(len(audio))
+        processed = server.preprocess_lean(audio, pool)
+    else:
+        processed = server.preprocess(audio)
+    t2 = time.perf_counter()
+    if selected_f is not None:
+        freq, conf, _ = server.analyze_targeted_preprocessed(processed, selected_f, args.lean,
+                                                             args.decimation, args.parallelism)
+    else:
+        freq, conf, _ = server.analyze_preprocessed(processed, args.lean, args.decimation, args.parallelism)
+    t3 = time.perf_counter()
+    timings.update(decode=t1 - t0, preprocess=t2 - t1, analyze=t3 - t2)
+    result = {"duration": len(audio) / server.SAMPLE_RATE, "sample_rate": sr}
+    if freq > 0:
+        if selected_f is not None:
+            cents = float(1200 * np.log2(freq / selected_f))
+        else:
+            note, cents, _ = server.closest_note(freq)
+        result.update(note=note, frequency=round(freq, 2), cents=round(cents, 1),
+                      confidence=round(conf, 2))
+    else:
+        result.update(note=None)
+    return result, timings
+
+def compare(old: Optional[dict], new: dict, tol: float) -> Optional[str]:
+    """Describe a meaningful difference between two results, if any"""
+    if old is None:
+        return None
+    if old.get("note") != new.get("note"):
+        return f"note {old.get('note')} → {new.get('note')}"
+    if old.get("note") is not None and abs(old["cents"] - new["cents"]) > tol:
+        return f"cents {old['cents']:+.1f} → {new['cents']:+.1f}"
+    return None
+
+def stage_stats(samples: list[float]) -> str:
+    ms = np.array(samples) * 1000
+    return (f"mean {ms.mean():8.2f}  p50 {np.percentile(ms, 50):8.2f}  "
+            f"p95 {np.percentile(ms, 95):8.2f}  p99 {np.percentile(ms, 99):8.2f}  ms")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="capture directory (TUNE_CAPTURE_DIR)")
+    parser.add_argument("--baseline", help="results JSONL from an earlier replay --out")
+    parser.add_argument("--out", help="write this build's results as JSONL")
+    parser.add_argument("--cents-tol", type=float, default=1.0,
+                        help="report cents changes larger than this")
+    parser.add_argument("--limit", type=int, default=0, help="replay at most N captures")
+    parser.add_argument("--show", type=int, default=20, help="changes to list")
+    # default to whatever the server environment would use
+    parser.add_argument("--lean", action="store_true", default=server.TUNE_LEAN)
+    parser.add_argument("--decimation", type=int, default=server.ANALYSIS_DECIMATION)
+    parser.add_argument("--parallelism", type=int, default=server.REQUEST_PARALLELISM["tune"])
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in f:
+                row = json.loads(line)
+                baseline[row["id"]] = row
+    out = open(args.out, "w") if args.out else None
+
+    timings = {stage: [] for stage in STAGES}
+    changes, errors = [], 0
+    replayed, audio_seconds = 0, 0.0
+    started = time.perf_counter()
+    try:
+        for meta, payload in tune_capture.load_captures(args.directory):
+            if args.limit and replayed >= args.limit:
+                break
+            replayed += 1
+            try:
+                result, t = replay_one(payload, args, meta.get("note_field"))
+            except Exception as e:
+                errors += 1
+                result, t = {"error": str(e)}, None
+            result["id"] = meta["id"]
+            if out:
+                out.write(json.dumps(result) + "\n")
+            if t is None:
+                continue
+            for stage in STAGES:
+                timings[stage].append(t[stage])
+            audio_seconds += result["duration"]
+            old = baseline.get(meta["id"]) if args.baseline else (
+                meta.get("result") or ({"note": None} if meta.get("status") == 400 else None))
+            diff = compare(old, result, args.cents_tol)
+            if diff:
+                changes.append((meta["id"], meta.get("content_type"), diff))
+    finally:
+        if out:
+            out.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    print(f"replayed {replayed} captures ({errors} failed to decode/analyze) in {elapsed:.1f}s — "
+          f"{replayed / elapsed:.1f} clips/s, {audio_seconds / elapsed:.1f} audio-s/s")
+    if timings["decode"]:
+        for stage in STAGES:
+            print(f"  {stage:10s} {stage_stats(timings[stage])}")
+    against = args.baseline or "captured results"
+    print(f"{len(changes)} changed vs {against} (cents tol {args.cents_tol})")
+    for cid, ctype, diff in changes[:args.show]:
+        print(f"  {cid}  {ctype or '?':12s} {diff}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -391,17 +391,34 @@
 
 # server.py
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Header, Depends
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Header, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
 from pydantic import BaseModel
 import numpy as np
 import io
-from typing import Optional, Dict, Any, List
+import os
+import json
+import time
+import hashlib
+from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime
 import logging
+import threading
+import weakref
+import tracemalloc
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
 import soundfile as sf
 import librosa
+import scipy.fft
 import scipy.signal
+import pitch_kernels
+import tuning_analytics
+import catalog_search
+import tune_capture
 
 # ───── App & Logging ─────────────────────────────────────────
 logging.basicConfig(level=logging.INFO)
@@ -416,6 +433,28 @@ app.add_middleware(
 SAMPLE_RATE   = 44100
 ERROR_MARGIN  = 5   # ±5 cents
 GUITAR_NOTES  = { 'E2':82.41,'A2':110.00,'D3':146.83,'G3':196.00,'B3':246.94,'E4':329.63 }
+# auto | numba | numpy, resolved now so a bad value or missing numba fails at startup
+PITCH_BACKEND = pitch_kernels.resolve_backend(os.getenv("PITCH_BACKEND", "auto"))
+TUNE_LEAN     = os.getenv("TUNE_LEAN", "0") == "1"      # float32 + scratch-buffer pipeline
+ANALYSIS_RATE = int(os.getenv("TUNE_ANALYSIS_RATE", "0"))  # e.g. 5512 → detectors at 44100/8; 0 = full rate
+ANALYSIS_DECIMATION = max(1, SAMPLE_RATE // ANALYSIS_RATE) if ANALYSIS_RATE else 1
+# Manual mode: narrowband search around the selected string
+TARGET_SEARCH_CENTS = float(os.getenv("TUNE_TARGET_SEARCH_CENTS", "300"))
+TARGET_MIN_CLARITY  = 0.2 # narrowband estimators may disagree by at most 40 cents
+TARGET_DECIMATION   = 8   # 5512.5Hz leaves the 3rd harmonic of E4 below Nyquist
+# Upload limits for /tune
+TUNE_MAX_BYTES       = int(float(os.getenv("TUNE_MAX_UPLOAD_MB", "8")) * 1024 * 1024)
+TUNE_MAX_DURATION    = float(os.getenv("TUNE_MAX_DURATION", "30"))    # seconds declared in header
+TUNE_ANALYSIS_WINDOW = float(os.getenv("TUNE_ANALYSIS_WINDOW", "4"))  # seconds actually decoded
+# Intra-request fan-out: threads one request may use from the shared analysis pool
+ANALYSIS_THREADS = int(os.getenv("TUNE_ANALYSIS_THREADS", str(os.cpu_count() or 4)))
+REQUEST_PARALLELISM = {
+    "tune":  int(os.getenv("TUNE_PARALLELISM", "1")),   # segment + whole-clip analyses
+    "track": int(os.getenv("TRACK_PARALLELISM", "1")),  # the four detectors per frame
+}
+TRACE_ALLOC   = os.getenv("TUNE_TRACE_ALLOC", "0") == "1"  # tracemalloc peak per request
+if TRACE_ALLOC:
+    tracemalloc.start()
 
 # ───── Admin Config ───────────────────────────────────────────
 import os
@@ -447,6 +486,40 @@ LESSONS: List[Dict[str, Any]] = []
 COURSE_ID_SEQ = 1
 LESSON_ID_SEQ = 1
 
+class CatalogCache:
+    """Serialized catalog responses with ETags, dropped precisely on writes"""
+
+    def __init__(self):
+        self.entries: Dict[Any, tuple[str, bytes]] = {}   # key → (etag, body)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def get(self, key, build: Callable[[], Any]) -> tuple[str, bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            body = json.dumps(build(), separators=(",", ":")).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            entry = self.entries[key] = (etag, body)
+        return entry
+
+CATALOG_CACHE = CatalogCache()
+SEARCH_INDEX = catalog_search.CatalogIndex()   # maintained on every create
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+def cached_catalog_response(key, build: Callable[[], Any], if_none_match: Optional[str]) -> Response:
+    etag, body = CATALOG_CACHE.get(key, build)
+    # private: responses depend on the instructor token; no-cache: always revalidate
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 class CourseCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -457,6 +530,39 @@ class LessonCreate(BaseModel):
     description: Optional[str] = None
     content_url: Optional[str] = None
 
+# ───── /tune traffic capture (opt-in, for replay.py) ──────────
+TUNE_CAPTURE = tune_capture.CaptureRing(
+    os.environ["TUNE_CAPTURE_DIR"],
+    rate=float(os.getenv("TUNE_CAPTURE_RATE", "0.05")),
+    max_bytes=int(os.getenv("TUNE_CAPTURE_MAX_MB", "256")) * 1024 * 1024,
+    max_files=int(os.getenv("TUNE_CAPTURE_MAX_FILES", "5000")),
+) if os.getenv("TUNE_CAPTURE_DIR") else None
+TUNE_CAPTURE_BACKLOG = 32   # queued writes before new samples are dropped
+
+# one writer thread: /tune never waits on, or fails because of, the capture disk
+_capture_writer: Optional[ThreadPoolExecutor] = None
+_capture_slots = threading.BoundedSemaphore(TUNE_CAPTURE_BACKLOG)
+
+def save_capture(payload: bytes, meta: Dict[str, Any]):
+    """Queue one capture for writing; skipped if the writer is already behind"""
+    global _capture_writer
+    if not _capture_slots.acquire(blocking=False):
+        logger.warning("Capture writer behind; dropping sample")
+        return
+    def write():
+        try:
+            TUNE_CAPTURE.save(payload, meta)
+        except OSError as e:
+            logger.warning(f"Capture not saved: {e}")
+        finally:
+            _capture_slots.release()
+    if _capture_writer is None:
+        _capture_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tune-capture")
+    _capture_writer.submit(write)
+
+# ───── Tuning Analytics (fixed memory, in-process) ────────────
+TUNING_ANALYTICS = tuning_analytics.TuningAnalytics()
+
 # ───── Response Model ────────────────────────────────────────
 class TuningResult(BaseModel):
     note:             str
@@ -486,27 +592,225 @@ def preprocess(audio: np.ndarray) -> np.ndarray:
                               btype="band", output="sos")
     return scipy.signal.sosfilt(sos, audio)
 
+# ───── Lean float32 pipeline ─────────────────────────────────
+class ScratchPool:
+    """Reusable scratch buffers for one worker thread, grown to the largest clip seen"""
+
+    def __init__(self):
+        self.buffers: Dict[Any, np.ndarray] = {}
+        self.window_lengths: Dict[Any, int] = {}   # length currently held in each "hann" buffer
+        self.allocations = 0
+        self.reuses = 0
+
+    def get(self, name: str, n: int, dtype=np.float32) -> np.ndarray:
+        key = (name, np.dtype(dtype))
+        buf = self.buffers.get(key)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty(n, dtype=dtype)
+            self.buffers[key] = buf
+            self.allocations += 1
+        else:
+            self.reuses += 1
+        return buf[:n]
+
+    def hanning(self, n: int, dtype=np.float32) -> np.ndarray:
+        """np.hanning(n) in a pooled buffer, rebuilt only when n changes, so clip
+        lengths that vary by a few samples don't each leave a window behind"""
+        win = self.get("hann", n, dtype)
+        key = np.dtype(dtype)
+        if self.window_lengths.get(key) != n:
+            if n > 1:
+                # 0.5 + 0.5*cos(pi*k/(n-1)) for k = 1-n, 3-n, ..., n-1, without temporaries
+                win.fill(2)
+                win[0] = 1 - n
+                np.cumsum(win, out=win)
+                win *= np.pi / (n - 1)
+                np.cos(win, out=win)
+                win *= 0.5
+                win += 0.5
+            else:
+                win.fill(1)
+            self.window_lengths[key] = n
+        return win
+
+    def reserve(self, n: int, dtype=np.float32):
+        """Size the per-request buffers to the clip up front"""
+        for name in ("emphasis", "windowed", "mag", "hps"):
+            self.get(name, n, dtype)
+
+    def stats(self) -> Dict[str, int]:
+        return {"allocations": self.allocations, "reuses": self.reuses,
+                "pool_bytes": sum(b.nbytes for b in list(self.buffers.values()))}
+
+_scratch = threading.local()
+# every live thread's pool, for reporting; a pool goes with its thread's locals
+_scratch_pools: "weakref.WeakSet[ScratchPool]" = weakref.WeakSet()
+_scratch_pools_lock = threading.Lock()
+
+def scratch_pool() -> ScratchPool:
+    pool = getattr(_scratch, "pool", None)
+    if pool is None:
+        pool = _scratch.pool = ScratchPool()
+        with _scratch_pools_lock:
+            _scratch_pools.add(pool)
+    return pool
+
+def scratch_stats() -> Dict[str, int]:
+    """stats() summed over the pools of all threads, analysis-pool workers included"""
+    with _scratch_pools_lock:
+        pools = list(_scratch_pools)
+    total = {"allocations": 0, "reuses": 0, "pool_bytes": 0}
+    for pool in pools:
+        for k, v in pool.stats().items():
+            total[k] += v
+    return total
+
+@lru_cache(maxsize=8)
+def bandpass_sos(sample_rate: int, dtype=np.float32) -> np.ndarray:
+    return scipy.signal.butter(4, [70/(sample_rate/2), 400/(sample_rate/2)],
+                               btype="band", output="sos").astype(dtype)
+
+def preprocess_lean(audio: np.ndarray, pool: ScratchPool) -> np.ndarray:
+    """preprocess() in float32, in place; only sosfilt allocates its output"""
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    elif audio.dtype != np.float32:
+        audio = audio.astype(np.float32)
+    audio -= audio.mean()
+    mx = max(float(audio.max()), -float(audio.min())) if len(audio) else 0.0
+    if mx > 0:
+        audio /= mx
+    if len(audio) > 1:
+        tmp = pool.get("emphasis", len(audio) - 1)
+        np.multiply(audio[:-1], 0.97, out=tmp)
+        audio[1:] -= tmp
+    return scipy.signal.sosfilt(bandpass_sos(SAMPLE_RATE), audio)
+
+# ───── Decimated analysis ─────────────────────────────────────
+def decimate(audio: np.ndarray, factor: int) -> np.ndarray:
+    """Polyphase anti-alias decimation of an already band-limited (≤400Hz) signal"""
+    if factor <= 1:
+        return audio
+    return scipy.signal.resample_poly(audio, 1, factor)
+
+def parabolic_offset(y: np.ndarray, i: int) -> float:
+    """Sub-sample offset of the peak at i, from a parabola through its neighbours"""
+    if not 1 <= i < len(y) - 1:
+        return 0.0
+    y1, y2, y3 = y[i-1:i+2]
+    denom = (2 * y2 - y1 - y3)
+    return float(np.clip((y3 - y1) / (2 * denom), -0.5, 0.5)) if denom != 0 else 0.0
+
+# ───── Shared analysis thread pool ────────────────────────────
+_analysis_pool: Optional[ThreadPoolExecutor] = None
+_analysis_pool_lock = threading.Lock()
+
+def analysis_pool() -> ThreadPoolExecutor:
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is None:
+            _analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_THREADS,
+                                                thread_name_prefix="pitch")
+        return _analysis_pool
+
+def run_parallel(tasks: List[Callable[[], Any]], parallelism: int = 1) -> List[Any]:
+    """Run zero-argument tasks using at most `parallelism` threads (the caller
+    plus shared-pool workers) and return their results in order. NumPy/FFT
+    work releases the GIL, so independent analyses overlap. Each lane takes
+    the next pending task when it finishes one, so list the longest first.
+    Tasks must not call run_parallel themselves."""
+    lanes = min(max(1, parallelism), len(tasks))
+    if lanes <= 1:
+        return [t() for t in tasks]
+    results: List[Any] = [None] * len(tasks)
+    pending = iter(range(len(tasks)))
+    lock = threading.Lock()
+
+    def lane():
+        while True:
+            with lock:
+                i = next(pending, None)
+            if i is None:
+                return
+            results[i] = tasks[i]()
+
+    futures = [analysis_pool().submit(lane) for _ in range(1, lanes)]
+    lane()
+    for fut in futures:
+        fut.result()
+    return results
+
 # ───── Multi-Method Pitch Detection ──────────────────────────
 class EnhancedPitchDetector:
     """Combines multiple pitch detection methods with confidence weighting"""
 
-    def __init__(self, sample_rate: int = SAMPLE_RATE):
+    def __init__(self, sample_rate: float = SAMPLE_RATE, backend: str = PITCH_BACKEND,
+                 lean: bool = False):
         self.sample_rate = sample_rate
-        self.window_size = 4096
-        self.hop_length = 512
+        # keep the same time spans when running on a decimated signal
+        self.decimation = max(1, int(SAMPLE_RATE // sample_rate))
+        self.window_size = 4096 // self.decimation
+        self.hop_length = 512 // self.decimation
+        self.frame_length = 2048 // self.decimation
+        # lags and quefrencies are always searched on the full-rate grid: at 5.5kHz
+        # E4's period is under 17 samples, far too coarse to peak-pick directly
+        self.lag_rate = sample_rate * self.decimation
+        self.backend = backend   # already resolved: "numba" or "numpy"
+        self.use_kernels = backend == "numba"
+        # lean mode: scratch buffers from the calling thread's pool + dtype-preserving FFTs
+        self.lean = lean
+        # HPS only reads the first 4096 samples of a window, so a decimated detector
+        # runs it at full rate when given the full-rate span (see detect())
+        self.full_rate = self if self.decimation == 1 else EnhancedPitchDetector(
+            SAMPLE_RATE, backend, lean)
+
+    def _windowed(self, audio: np.ndarray) -> np.ndarray:
+        if not self.lean:
+            return audio * np.hanning(len(audio))
+        pool = scratch_pool()
+        out = pool.get("windowed", len(audio), audio.dtype)
+        return np.multiply(audio, pool.hanning(len(audio), audio.dtype), out=out)
+
+    def _rfft(self, x: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+        return scipy.fft.rfft(x, n=n) if self.lean else np.fft.rfft(x, n=n)
+
+    def _irfft(self, x: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+        return scipy.fft.irfft(x, n=n) if self.lean else np.fft.irfft(x, n=n)
+
+    def _magnitude(self, spec: np.ndarray) -> np.ndarray:
+        """|spec|, scaled by the decimation factor so spectra of a decimated clip
+        have the same amplitudes as the full-rate ones"""
+        if not self.lean:
+            mag = np.abs(spec)
+        else:
+            mag = np.abs(spec, out=scratch_pool().get("mag", len(spec), spec.real.dtype))
+        if self.decimation > 1:
+            mag *= self.decimation
+        return mag
 
     def enhanced_autocorrelation(self, audio: np.ndarray) -> tuple[float, float]:
-        windowed = audio * np.hanning(len(audio))
-        corr = np.correlate(windowed, windowed, mode='full')
-        corr = corr[len(corr)//2:]
+        windowed = self._windowed(audio)
+        if self.decimation == 1:
+            if self.use_kernels:
+                freq, conf = pitch_kernels.autocorr_pitch(windowed, self.sample_rate)
+                return float(freq), float(conf)
+            corr = np.correlate(windowed, windowed, mode='full')
+            corr = corr[len(corr)//2:]
+        else:
+            # linear autocorrelation via the power spectrum; zero-padding the spectrum
+            # band-limited-interpolates it back onto every full-rate lag
+            n = len(windowed)
+            power = self._magnitude(self._rfft(windowed, n=2 * n))
+            power *= power
+            corr = self._irfft(power, n=2 * n * self.decimation)[:n * self.decimation]
         if len(corr) == 0 or corr[0] == 0:
             return 0.0, 0.0
-        corr = corr / corr[0]
+        corr /= corr[0]
         d = np.diff(corr)
         pos = np.where(d > 0)[0]
         start = int(pos[0]) if len(pos) else 0
-        min_p = int(self.sample_rate / 400)
-        max_p = int(self.sample_rate / 70)
+        min_p = int(self.lag_rate / 400)
+        max_p = int(self.lag_rate / 70)
         if start >= max_p:
             return 0.0, 0.0
         rng = corr[max(start, min_p):min(max_p, len(corr))]
@@ -518,17 +822,17 @@ class EnhancedPitchDetector:
             denom = (2 * y2 - y1 - y3)
             x0 = (y3 - y1) / (2 * denom) if denom != 0 else 0.0
             true_peak = peak_idx + x0
-            freq = self.sample_rate / true_peak
+            freq = self.lag_rate / true_peak
             conf = float(max(0.0, min(1.0, y2)))
         else:
-            freq = self.sample_rate / max(peak_idx, 1)
+            freq = self.lag_rate / max(peak_idx, 1)
             conf = float(max(0.0, min(1.0, corr[peak_idx])))
         return float(freq), float(conf)
 
     def yin(self, audio: np.ndarray) -> tuple[float, float]:
         try:
             pitches = librosa.yin(audio, fmin=70, fmax=400, sr=self.sample_rate,
-                                  hop_length=self.hop_length, frame_length=2048,
+                                  hop_length=self.hop_length, frame_length=self.frame_length,
                                   trough_threshold=0.1)
             valid = pitches[pitches > 0]
             if len(valid) == 0:
@@ -541,10 +845,14 @@ class EnhancedPitchDetector:
             return 0.0, 0.0
 
     def harmonic_product_spectrum(self, audio: np.ndarray) -> tuple[float, float]:
-        windowed = audio * np.hanning(len(audio))
-        fft = np.fft.rfft(windowed, n=self.window_size)
-        mag = np.abs(fft)
-        hps = mag.copy()
+        windowed = self._windowed(audio)
+        fft = self._rfft(windowed, n=self.window_size)
+        mag = self._magnitude(fft)
+        if not self.lean:
+            hps = mag.copy()
+        else:
+            hps = scratch_pool().get("hps", len(mag), mag.dtype)
+            hps[:] = mag
         for h in range(2, 6):
             ds = mag[::h]
             hps[:len(ds)] *= ds
@@ -558,27 +866,49 @@ class EnhancedPitchDetector:
         return freq, conf
 
     def cepstral(self, audio: np.ndarray) -> tuple[float, float]:
-        windowed = audio * np.hanning(len(audio))
-        spec = np.fft.rfft(windowed)
-        log_mag = np.log(np.abs(spec) + 1e-10)
-        cep = np.fft.irfft(log_mag)
-        min_q = int(self.sample_rate / 400)
-        max_q = int(self.sample_rate / 70)
+        windowed = self._windowed(audio)
+        spec = self._rfft(windowed)
+        log_mag = self._magnitude(spec)
+        log_mag += 1e-10
+        np.log(log_mag, out=log_mag)
+        if self.decimation == 1:
+            cep = self._irfft(log_mag)
+        else:
+            # rebuild the full-rate log spectrum, taking the band the decimated clip
+            # no longer has to sit at the noise floor seen at its band edge
+            full = np.full(self.decimation * (len(log_mag) - 1) + 1,
+                           np.mean(log_mag[-max(1, len(log_mag) // 8):]), dtype=log_mag.dtype)
+            full[:len(log_mag)] = log_mag
+            cep = self._irfft(full)
+        min_q = int(self.lag_rate / 400)
+        max_q = int(self.lag_rate / 70)
         if min_q >= len(cep):
             return 0.0, 0.0
         rng = cep[min_q:min(max_q, len(cep))]
         if len(rng) == 0:
             return 0.0, 0.0
         peak_idx = int(np.argmax(rng)) + min_q
-        freq = float(self.sample_rate / peak_idx)
+        freq = float(self.lag_rate / peak_idx)
         conf = float(min(1.0, (cep[peak_idx] / (np.std(cep) + 1e-9)) / 5))
         return freq, conf
 
-    def detect(self, audio: np.ndarray) -> tuple[float, float, float]:
-        f_ac, c_ac = self.enhanced_autocorrelation(audio)
-        f_yin, c_yin = self.yin(audio)
-        f_hps, c_hps = self.harmonic_product_spectrum(audio)
-        f_cep, c_cep = self.cepstral(audio)
+    def method_tasks(self, audio: np.ndarray,
+                     full_rate: Optional[np.ndarray] = None) -> List[Callable[[], tuple[float, float]]]:
+        """The four estimators on `audio` as zero-argument tasks, in fuse() order.
+        full_rate: the same span at SAMPLE_RATE, if available, for the HPS bins"""
+        hps = (partial(self.full_rate.harmonic_product_spectrum, full_rate) if full_rate is not None
+               else partial(self.harmonic_product_spectrum, audio))
+        return [partial(self.enhanced_autocorrelation, audio), partial(self.yin, audio),
+                hps, partial(self.cepstral, audio)]
+
+    def detect(self, audio: np.ndarray, parallelism: int = 1,
+               full_rate: Optional[np.ndarray] = None) -> tuple[float, float, float]:
+        return self.fuse(run_parallel(self.method_tasks(audio, full_rate), parallelism))
+
+    @staticmethod
+    def fuse(estimates: List[tuple[float, float]]) -> tuple[float, float, float]:
+        """Confidence-weighted vote over the method_tasks() results"""
+        (f_ac, c_ac), (f_yin, c_yin), (f_hps, c_hps), (f_cep, c_cep) = estimates
         results = [
             (f_ac, c_ac * 1.2),
             (f_yin, c_yin * 1.1),
@@ -596,34 +926,170 @@ class EnhancedPitchDetector:
         return float(weighted_f), confidence, clarity
 
 
-def analyze_pitch_enhanced(audio: np.ndarray) -> tuple[float, float, float]:
-    """End-to-end enhanced pitch analysis with stability check"""
-    processed = preprocess(audio)
-    rms = float(np.sqrt(np.mean(processed**2)))
+def analyze_pitch_enhanced(audio: np.ndarray, lean: bool = False, decimation: int = 1,
+                           parallelism: int = 1) -> tuple[float, float, float]:
+    """End-to-end enhanced pitch analysis with stability check.
+    lean=True runs the float32 in-place pipeline on this thread's scratch pool
+    (audio is modified in place). decimation > 1 runs the detectors on the
+    band-passed signal decimated to SAMPLE_RATE/decimation. parallelism > 1
+    spreads every method of every segment and of the whole clip over the
+    shared analysis pool."""
+    if lean:
+        pool = scratch_pool()
+        pool.reserve(len(audio))
+        processed = preprocess_lean(audio, pool)
+    else:
+        processed = preprocess(audio)
+    return analyze_preprocessed(processed, lean, decimation, parallelism)
+
+def analyze_preprocessed(processed: np.ndarray, lean: bool = False, decimation: int = 1,
+                         parallelism: int = 1) -> tuple[float, float, float]:
+    """Stability-checked multi-method analysis of an already preprocessed clip"""
+    if lean:
+        rms = float(np.sqrt(np.dot(processed, processed) / max(len(processed), 1)))
+    else:
+        rms = float(np.sqrt(np.mean(processed**2)))
     if rms < 0.001:
         return 0.0, 0.0, 0.0
-    detector = EnhancedPitchDetector(SAMPLE_RATE)
-    # Segmental median for stability
+    full = processed
+    processed = decimate(full, decimation)
+    detector = EnhancedPitchDetector(SAMPLE_RATE / decimation, lean=lean)
+    # Segmental median for stability; boundaries are placed in full-rate samples so a
+    # decimated run analyses the same spans (and HPS the same samples) as a full-rate one
     segs = 5
-    length = len(processed)
-    seg_size = max(1024, length // segs)
-    seg_freqs, seg_confs = [], []
+    length = len(full)
+    min_seg = 1024
+    seg_size = max(min_seg, length // segs)
+    # the whole-clip estimate is needed on both paths below, so it runs alongside;
+    # it goes first because its methods are the longest tasks
+    spans = [(processed, full if decimation > 1 else None)]
     for i in range(segs):
         start = i * seg_size
         end = length if i == segs - 1 else min(length, (i + 1) * seg_size)
-        if end - start < 1024:
+        if end - start < min_seg:
             continue
-        f, c, _ = detector.detect(processed[start:end])
+        if decimation == 1:
+            spans.append((processed[start:end], None))
+        else:
+            low = processed[start // decimation:
+                            len(processed) if end == length else end // decimation]
+            spans.append((low, full[start:end]))
+    # one task per (span, method), so a long whole-clip method doesn't hold up the rest
+    tasks = [t for audio, span in spans for t in detector.method_tasks(audio, span)]
+    estimates = run_parallel(tasks, parallelism)
+    per = len(tasks) // len(spans)
+    base, *seg_results = [detector.fuse(estimates[k:k + per])
+                          for k in range(0, len(estimates), per)]
+    seg_freqs, seg_confs = [], []
+    for f, c, _ in seg_results:
         if f > 0 and c > 0.6:
             seg_freqs.append(f)
             seg_confs.append(c)
     if seg_freqs:
         freq = float(np.median(seg_freqs))
-        base_f, base_c, base_cl = detector.detect(processed)
+        base_f, base_c, base_cl = base
         conf = float(min(1.0, (np.mean(seg_confs) + base_c) / 2))
         clarity = float(min(1.0, 1.0 - (np.std(seg_freqs) / (np.mean(seg_freqs) + 1e-9))))
         return freq, conf, clarity
-    return detector.detect(processed)
+    return base
+
+# ───── Targeted (manual-mode) Pitch Detection ─────────────────
+class NarrowbandPitchDetector:
+    """Searches only ±search_cents around a known string's fundamental: a
+    harmonic zoom-FFT bank plus an autocorrelation over the matching lags.
+    Octave errors are impossible since no other octave is ever evaluated."""
+
+    def __init__(self, target_freq: float, sample_rate: float = SAMPLE_RATE / TARGET_DECIMATION,
+                 search_cents: float = TARGET_SEARCH_CENTS):
+        self.sample_rate = sample_rate
+        self.target_freq = target_freq
+        self.f_lo = target_freq * 2 ** (-search_cents / 1200)
+        self.f_hi = target_freq * 2 ** (search_cents / 1200)
+        self.bins = 1024
+        self.harmonics = (1.0, 0.5, 0.33)   # weights for the fundamental, 2nd, 3rd
+
+    def harmonic_zoom_spectrum(self, audio: np.ndarray) -> tuple[float, float]:
+        windowed = audio * np.hanning(len(audio))
+        nyquist = self.sample_rate / 2
+        score = np.zeros(self.bins)
+        for h, w in enumerate(self.harmonics, start=1):
+            if h * self.f_hi >= nyquist:
+                break
+            # candidate grid f_k scaled by h, so bin k lines up across harmonics
+            spec = scipy.signal.zoom_fft(windowed, [h * self.f_lo, h * self.f_hi], m=self.bins,
+                                         fs=self.sample_rate, endpoint=True)
+            score += w * np.abs(spec)
+        peak_idx = int(np.argmax(score))
+        if not 1 <= peak_idx < self.bins - 1:
+            return 0.0, 0.0   # still rising at the window edge: the pitch is outside it
+        step = (self.f_hi - self.f_lo) / (self.bins - 1)
+        freq = self.f_lo + (peak_idx + parabolic_offset(score, peak_idx)) * step
+        conf = float(min(1.0, (score[peak_idx] / (np.mean(score) + 1e-9)) / 10))
+        return float(freq), conf
+
+    def constrained_autocorrelation(self, audio: np.ndarray) -> tuple[float, float]:
+        lo = max(1, int(self.sample_rate / self.f_hi) - 1)
+        hi = min(len(audio) - 1, int(np.ceil(self.sample_rate / self.f_lo)) + 1)
+        energy = float(np.dot(audio, audio))
+        if hi <= lo or energy == 0:
+            return 0.0, 0.0
+        lags = np.arange(lo, hi + 1)
+        corr = np.array([np.dot(audio[:-L], audio[L:]) for L in lags]) / energy
+        i = int(np.argmax(corr))
+        if not 1 <= i < len(lags) - 1:
+            return 0.0, 0.0   # no peak inside the lag range
+        freq = self.sample_rate / (lags[i] + parabolic_offset(corr, i))
+        return float(freq), float(max(0.0, min(1.0, corr[i])))
+
+    def detect(self, audio: np.ndarray) -> tuple[float, float, float]:
+        f_zoom, c_zoom = self.harmonic_zoom_spectrum(audio)
+        f_ac, c_ac = self.constrained_autocorrelation(audio)
+        if f_zoom <= 0 or f_ac <= 0:
+            return 0.0, 0.0, 0.0
+        # the zoom spectrum is the precise estimate; autocorrelation confirms it.
+        # A note played outside the window pulls the two apart (each lands on
+        # whatever the window still holds of it), so don't report that.
+        disagreement = abs(1200 * np.log2(f_ac / f_zoom))
+        clarity = float(max(0.0, 1.0 - disagreement / 50))
+        if clarity < TARGET_MIN_CLARITY:
+            return 0.0, 0.0, 0.0
+        confidence = float(min(1.0, (c_zoom + c_ac * 1.2) / 2.2) * (0.5 + 0.5 * clarity))
+        return f_zoom, confidence, clarity
+
+def analyze_pitch_targeted(audio: np.ndarray, target_freq: float, lean: bool = False,
+                           decimation: int = 1, parallelism: int = 1) -> tuple[float, float, float]:
+    """Manual-mode analysis: preprocess, then analyze_targeted_preprocessed().
+    lean=True works in place on this thread's scratch pool, as for
+    analyze_pitch_enhanced()."""
+    if lean:
+        pool = scratch_pool()
+        pool.reserve(len(audio))
+        processed = preprocess_lean(audio, pool)
+    else:
+        processed = preprocess(audio)
+    return analyze_targeted_preprocessed(processed, target_freq, lean, decimation, parallelism)
+
+def analyze_targeted_preprocessed(processed: np.ndarray, target_freq: float, lean: bool = False,
+                                  decimation: int = 1, parallelism: int = 1) -> tuple[float, float, float]:
+    """Decimate, then narrowband search near target_freq. If that finds nothing
+    it can vouch for (e.g. another string was played) the clip gets the open
+    multi-method analysis instead, whose answer is kept only if it lies outside
+    the searched window; decimation and parallelism apply to that."""
+    if lean:
+        rms = float(np.sqrt(np.dot(processed, processed) / max(len(processed), 1)))
+    else:
+        rms = float(np.sqrt(np.mean(processed**2)))
+    if rms < 0.001:
+        return 0.0, 0.0, 0.0
+    detector = NarrowbandPitchDetector(target_freq, SAMPLE_RATE / TARGET_DECIMATION)
+    freq, conf, clarity = detector.detect(decimate(processed, TARGET_DECIMATION))
+    if conf >= 0.3:
+        return freq, conf, clarity
+    # nothing inside the window; the open analysis may find the note outside it
+    freq, conf, clarity = analyze_preprocessed(processed, lean, decimation, parallelism)
+    if detector.f_lo <= freq <= detector.f_hi:
+        return 0.0, 0.0, 0.0   # contradicts the narrowband search
+    return freq, conf, clarity
 
 # ───── Pitch Detection (single-method via YIN for demo speed) ──
 def detect_pitch(audio: np.ndarray) -> (float, float):
@@ -637,37 +1103,176 @@ def detect_pitch(audio: np.ndarray) -> (float, float):
     confidence = float(min(1.0, len(valid)/len(pitches)))
     return freq, confidence
 
+def closest_note(freq: float) -> tuple[str, float, float]:
+    """Closest standard-tuning string: (note, cents off, target frequency)"""
+    closest, cents_diff, target_f = None, None, None
+    for n,freq_t in GUITAR_NOTES.items():
+        cents = 1200*np.log2(freq/freq_t)
+        if closest is None or abs(cents) < abs(cents_diff):
+            closest, cents_diff, target_f = n, cents, freq_t
+    return closest, float(cents_diff), target_f
+
+def report_allocations(response: Response, pool_before: Optional[Dict[str, int]]):
+    """Expose per-request scratch-pool misses and (optionally) traced peak bytes.
+    Counts cover every thread's pool, so with TUNE_PARALLELISM > 1 they include the
+    analysis workers; requests running concurrently show up in each other's deltas."""
+    parts = []
+    if pool_before is not None:
+        after = scratch_stats()
+        parts.append(f"pool_new={after['allocations'] - pool_before['allocations']}")
+        parts.append(f"pool_reused={after['reuses'] - pool_before['reuses']}")
+        parts.append(f"pool_bytes={after['pool_bytes']}")
+    if TRACE_ALLOC:
+        parts.append(f"traced_peak={tracemalloc.get_traced_memory()[1]}")
+    if parts:
+        response.headers["X-Tune-Allocations"] = ";".join(parts)
+        logger.info(f"Allocations: {' '.join(parts)}")
+
+# ───── Bounded upload ingestion ──────────────────────────────
+UPLOAD_CHUNK = 64 * 1024
+UPLOAD_FORM_SLACK = 64 * 1024   # multipart boundaries, part headers and the note field
+
+class TuneBodyLimit:
+    """Refuse a /tune body whose Content-Length is over the cap before the multipart
+    parser spools it to disk; read_upload still caps bodies sent without one"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/tune":
+            length = dict(scope["headers"]).get(b"content-length", b"")
+            if length.isdigit() and int(length) > TUNE_MAX_BYTES + UPLOAD_FORM_SLACK:
+                response = JSONResponse({"detail": f"Upload larger than {TUNE_MAX_BYTES} bytes"},
+                                        status_code=413)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# inside CORS (appended, not add_middleware's prepend) so the 413 carries its headers
+app.user_middleware.append(Middleware(TuneBodyLimit))
+
+def check_audio_header(head: bytes):
+    """Reject payloads whose magic bytes are not a container libsndfile decodes"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return
+    if head[:4] in (b"RF64", b"fLaC", b"OggS", b"FORM", b"caff", b"riff") or head[:3] == b"ID3":
+        return
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:   # MPEG audio frame sync
+        return
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        raise HTTPException(415, "WebM/Matroska audio is not supported; send WAV, FLAC or OGG.")
+    raise HTTPException(415, "Unsupported audio format; send WAV, FLAC or OGG.")
+
+async def read_upload(file: UploadFile, max_bytes: int = TUNE_MAX_BYTES) -> bytes:
+    """Read an upload in chunks under a byte cap, checking the header on the first chunk"""
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise HTTPException(413, f"Upload larger than {max_bytes} bytes")
+    buf = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK)
+        if not chunk:
+            break
+        if not buf:
+            check_audio_header(chunk)
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise HTTPException(413, f"Upload larger than {max_bytes} bytes")
+    if not buf:
+        raise HTTPException(400, "Empty upload")
+    return bytes(buf)
+
+def decode_audio(data: bytes, dtype: str = "float64", max_seconds: Optional[float] = None,
+                 max_duration: Optional[float] = None) -> tuple[np.ndarray, int]:
+    """Decode an uploaded clip to mono at SAMPLE_RATE; returns (audio, original rate).
+    The header is validated first; only the first max_seconds are decoded and clips
+    declaring more than max_duration are rejected without decoding."""
+    try:
+        sound = sf.SoundFile(io.BytesIO(data))
+    except Exception as e:
+        raise HTTPException(415, f"Unsupported audio: {e}")
+    with sound:
+        sr = sound.samplerate
+        if not 8000 <= sr <= 192000 or not 1 <= sound.channels <= 8:
+            raise HTTPException(400, f"Unsupported stream: {sr}Hz, {sound.channels} channels")
+        if max_duration is not None and sound.frames > max_duration * sr:
+            raise HTTPException(413, f"Clip longer than {max_duration:g}s; use /track for long recordings")
+        frames = sound.frames if max_seconds is None else min(sound.frames, int(max_seconds * sr))
+        audio = sound.read(frames, dtype=dtype, always_2d=False)
+    if audio.ndim > 1:
+        # downmix first: librosa.resample works along the last axis, i.e. channels
+        audio = audio.mean(axis=1, dtype=audio.dtype)
+    if sr != SAMPLE_RATE:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=SAMPLE_RATE)
+    return audio, sr
+
 # ───── Main /tune Endpoint ──────────────────────────────────
 @app.post("/tune", response_model=TuningResult)
 async def tune_guitar(
+    response: Response,
     file: UploadFile = File(...),
-    note: str = Form(None)   # ignored in auto, available in manual
+    note: str = Form(None)   # manual mode: selected string, enables the narrowband search
 ):
+    capture = None
     try:
-        # 1) Read file bytes
-        data = await file.read()
-        audio, sr = sf.read(io.BytesIO(data), always_2d=False)
-        if sr != SAMPLE_RATE:
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=SAMPLE_RATE)
-            sr = SAMPLE_RATE
-
-        # 2) Enhanced analysis (multi-method with stability)
-        freq, confidence, clarity = analyze_pitch_enhanced(audio)
+        started = time.perf_counter()
+        selected_f = None
+        if note:
+            selected_f = GUITAR_NOTES.get(note)
+            if selected_f is None:
+                raise HTTPException(400, f"Unknown note '{note}'. Expected one of {', '.join(GUITAR_NOTES)}.")
+        if TRACE_ALLOC:
+            tracemalloc.reset_peak()
+        pool_before = scratch_stats() if TUNE_LEAN else None
+
+        # 1) Read file bytes (bounded, header-checked)
+        data = await read_upload(file)
+        if TUNE_CAPTURE is not None and TUNE_CAPTURE.sampled():
+            capture = {"filename": file.filename, "content_type": file.content_type,
+                       "note_field": note, "bytes": len(data), "status": 500}
+        audio, sr = decode_audio(data, dtype="float32" if TUNE_LEAN else "float64",
+                                 max_seconds=TUNE_ANALYSIS_WINDOW, max_duration=TUNE_MAX_DURATION)
+        if capture is not None:
+            capture.update(sample_rate=sr, duration=round(len(audio) / SAMPLE_RATE, 3))
+
+        # 2) Targeted narrowband search in manual mode, else enhanced multi-method analysis
+        if selected_f is not None:
+            freq, confidence, clarity = analyze_pitch_targeted(
+                audio, selected_f, lean=TUNE_LEAN, decimation=ANALYSIS_DECIMATION,
+                parallelism=REQUEST_PARALLELISM["tune"])
+        else:
+            freq, confidence, clarity = analyze_pitch_enhanced(
+                audio, lean=TUNE_LEAN, decimation=ANALYSIS_DECIMATION,
+                parallelism=REQUEST_PARALLELISM["tune"])
+        report_allocations(response, pool_before)
         if freq <= 0:
+            TUNING_ANALYTICS.record(None, latency_ms=(time.perf_counter() - started) * 1000)
             raise HTTPException(400, "No clear pitch detected. Play louder or single note.")
 
-        # 3) Find closest string note
-        closest, cents_diff, target_f = None, None, None
-        for n,freq_t in GUITAR_NOTES.items():
-            cents = 1200*np.log2(freq/freq_t)
-            if closest is None or abs(cents) < abs(cents_diff):
-                closest, cents_diff, target_f = n, cents, freq_t
+        # 3) Cents against the selected string (manual) or the closest one (auto)
+        if selected_f is not None:
+            closest, cents_diff, target_f = note, float(1200*np.log2(freq/selected_f)), selected_f
+        else:
+            closest, cents_diff, target_f = closest_note(freq)
 
         # 4) Build response
         in_tune   = abs(cents_diff) <= ERROR_MARGIN
         direction = "sharp" if cents_diff > 0 else ("flat" if cents_diff < 0 else "perfect")
 
         logger.info(f"Tuned {closest}: {freq:.1f}Hz ({cents_diff:.1f}¢) conf={confidence:.2f} clr={clarity:.2f}")
+        # a reading outside the narrowband window is another string being played:
+        # file it under that string rather than as huge drift on the selected one
+        played, played_cents = closest, cents_diff
+        if selected_f is not None and abs(cents_diff) > TARGET_SEARCH_CENTS:
+            played, played_cents, _ = closest_note(freq)
+        TUNING_ANALYTICS.record(played, played_cents, abs(played_cents) <= ERROR_MARGIN,
+                                confidence, clarity,
+                                latency_ms=(time.perf_counter() - started) * 1000)
+        if capture is not None:
+            capture.update(status=200, result={"note": closest, "frequency": round(freq, 2),
+                                               "cents": round(cents_diff, 1),
+                                               "confidence": round(confidence, 2)})
 
         return TuningResult(
             note             = closest,
@@ -680,16 +1285,102 @@ async def tune_guitar(
             clarity          = round(clarity, 2)
         )
 
-    except HTTPException:
+    except HTTPException as e:
+        if capture is not None:
+            capture["status"] = e.status_code
         raise
     except Exception as e:
         logger.error(f"Error in tuning: {e}")
+        if capture is not None:
+            capture["error"] = str(e)
         raise HTTPException(500, str(e))
+    finally:
+        if capture is not None:
+            save_capture(data, capture)
+
+# ───── Streaming /track Endpoint (long recordings) ────────────
+TRACK_BLOCK_SIZE = 65536   # samples decoded per read; bounds peak memory
+TRACK_WINDOW     = 0.1     # analysis window, seconds
+TRACK_HOP        = 0.05    # default hop between estimates, seconds
+
+class StreamingPreprocessor:
+    """Block-wise counterpart of preprocess(): pre-emphasis + 70–400Hz bandpass
+    with filter state carried across blocks. Normalization is left to the
+    per-frame detectors, which are scale invariant."""
+
+    def __init__(self, sample_rate: int):
+        self.sos = scipy.signal.butter(4, [70/(sample_rate/2), 400/(sample_rate/2)],
+                                       btype="band", output="sos")
+        self.zi = np.zeros((self.sos.shape[0], 2))
+        self.prev = 0.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if block.ndim > 1:
+            block = np.mean(block, axis=1)
+        emphasized = np.empty_like(block)
+        emphasized[0] = block[0] - 0.97 * self.prev
+        emphasized[1:] = block[1:] - 0.97 * block[:-1]
+        self.prev = block[-1]
+        out, self.zi = scipy.signal.sosfilt(self.sos, emphasized, zi=self.zi)
+        return out
+
+def track_pitch(sound: sf.SoundFile, hop: float = TRACK_HOP):
+    """Yield one NDJSON line per hop while decoding `sound` block by block"""
+    sr = sound.samplerate
+    window = int(TRACK_WINDOW * sr)
+    step = max(1, int(hop * sr))
+    pre = StreamingPreprocessor(sr)
+    detector = EnhancedPitchDetector(sr)
+    buf = np.zeros(0)
+    consumed = 0   # samples dropped from the front of buf so far
+    skip = 0       # samples still to drop when hop > window
+    try:
+        for block in sound.blocks(blocksize=TRACK_BLOCK_SIZE, always_2d=True, dtype="float64"):
+            filtered = pre.process(block)
+            if skip:
+                cut = min(skip, len(filtered))
+                filtered, skip = filtered[cut:], skip - cut
+            buf = np.concatenate([buf, filtered])
+            pos = 0
+            while len(buf) - pos >= window:
+                frame = buf[pos:pos + window]
+                point = {"time": round((consumed + pos) / sr, 3), "frequency": 0.0,
+                         "note": None, "cents": None, "confidence": 0.0}
+                if float(np.sqrt(np.mean(frame**2))) >= 0.001:
+                    freq, conf, _ = detector.detect(frame, REQUEST_PARALLELISM["track"])
+                    if freq > 0:
+                        note, cents, _ = closest_note(freq)
+                        point.update(frequency=round(freq, 2), note=note,
+                                     cents=round(cents, 1), confidence=round(conf, 2))
+                yield json.dumps(point) + "\n"
+                pos += step
+            skip += max(0, pos - len(buf))
+            buf = buf[pos:]
+            consumed += pos
+    finally:
+        sound.close()
+
+@app.post("/track")
+async def track(
+    file: UploadFile = File(...),
+    hop: float = Form(TRACK_HOP)
+):
+    """Pitch time series for long recordings, streamed as NDJSON"""
+    if not (0.005 <= hop <= 5.0):
+        raise HTTPException(400, "hop must be between 0.005 and 5 seconds")
+    try:
+        # UploadFile spools to disk, so decoding reads blocks straight from it
+        sound = sf.SoundFile(file.file)
+    except Exception as e:
+        raise HTTPException(400, f"Unsupported audio: {e}")
+    logger.info(f"Tracking {sound.frames / sound.samplerate:.1f}s @ {sound.samplerate}Hz")
+    return StreamingResponse(track_pitch(sound, hop), media_type="application/x-ndjson")
 
 # ───── Health Check & Runner ─────────────────────────────────
 @app.get("/health")
 async def health(): 
-    return {"status":"healthy","version":"2.1.0"}
+    return {"status":"healthy","version":"2.1.0",
+            "pitch_backend":PITCH_BACKEND}
 
 # ───── Onboarding API ─────────────────────────────────────────
 @app.post("/onboarding/save")
@@ -731,6 +1422,10 @@ async def list_users(_: bool = Depends(require_admin)):
 async def admin_onboarding(_: bool = Depends(require_admin)):
     return {"submissions": ONBOARDING_SUBMISSIONS}
 
+@app.get("/admin/analytics/tuning")
+async def admin_tuning_analytics(histograms: bool = True, _: bool = Depends(require_admin)):
+    return TUNING_ANALYTICS.snapshot(histograms=histograms)
+
 # ───── Instructor endpoints ───────────────────────────────────
 @app.post("/instructor/login")
 async def instructor_login(password: str = Form(...)):
@@ -750,11 +1445,16 @@ async def create_course(course: CourseCreate, _: bool = Depends(require_instruct
     }
     COURSE_ID_SEQ += 1
     COURSES.append(new_course)
+    CATALOG_CACHE.invalidate("courses")
+    SEARCH_INDEX.add_course(new_course)
     return new_course
 
 @app.get("/instructor/courses")
-async def list_courses(_: bool = Depends(require_instructor)):
-    return {"courses": COURSES}
+async def list_courses(
+    if_none_match: Optional[str] = Header(default=None),
+    _: bool = Depends(require_instructor)
+):
+    return cached_catalog_response("courses", lambda: {"courses": COURSES}, if_none_match)
 
 @app.post("/instructor/courses/{course_id}/lessons")
 async def create_lesson(course_id: int, lesson: LessonCreate, _: bool = Depends(require_instructor)):
@@ -771,8 +1471,37 @@ async def create_lesson(course_id: int, lesson: LessonCreate, _: bool = Depends(
     }
     LESSON_ID_SEQ += 1
     LESSONS.append(new_lesson)
+    CATALOG_CACHE.invalidate(("lessons", course_id))
+    SEARCH_INDEX.add_lesson(new_lesson)
     return new_lesson
 
 @app.get("/instructor/courses/{course_id}/lessons")
-async def list_lessons(course_id: int, _: bool = Depends(require_instructor)):
-    return {"lessons": [l for l in LESSONS if l["course_id"] == course_id]}
+async def list_lessons(
+    course_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    _: bool = Depends(require_instructor)
+):
+    build = lambda: {"lessons": [l for l in LESSONS if l["course_id"] == course_id]}
+    # ids are sequential, so only existing courses get a cache entry
+    if not 1 <= course_id < COURSE_ID_SEQ:
+        return build()
+    return cached_catalog_response(("lessons", course_id), build, if_none_match)
+
+# ───── Catalog search ─────────────────────────────────────────
+@app.get("/courses/search")
+async def search_courses(
+    q: str,
+    limit: int = 20,
+    type: Optional[str] = None,
+    course_id: Optional[int] = None,
+    _: bool = Depends(require_instructor)
+):
+    # same audience as the /instructor catalog listings it searches
+    if type not in (None, "course", "lesson"):
+        raise HTTPException(status_code=400, detail="type must be 'course' or 'lesson'")
+    limit = max(1, min(limit, 100))
+    # multi-word queries over common words still read thousands of postings;
+    # keep that off the event loop
+    results = await run_in_threadpool(SEARCH_INDEX.search, q, limit=limit,
+                                      doc_type=type, course_id=course_id)
+    return {"query": q, "results": results}
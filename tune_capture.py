@@ -0,0 +1,100 @@
+# tune_capture.py
+"""Sampled, size-bounded on-disk ring of /tune uploads for offline replay.
+
+Each capture is a pair of files sharing a sortable stem:
+    <unix ns>-<seq>.bin    the raw upload, byte for byte
+    <unix ns>-<seq>.json   metadata: filename, content type, note field,
+                           decoded rate/duration and the served result
+When the ring exceeds its byte or file budget the oldest captures are removed.
+"""
+import os
+import json
+import time
+import random
+import threading
+from collections import deque
+from typing import Dict, Any, Iterator, Tuple
+
+class CaptureRing:
+    def __init__(self, directory: str, rate: float = 0.05,
+                 max_bytes: int = 256 * 1024 * 1024, max_files: int = 5000):
+        self.directory = directory
+        self.rate = rate
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.lock = threading.Lock()
+        self.seq = 0
+        os.makedirs(directory, exist_ok=True)
+        # pick up captures left by earlier runs so the budget holds across restarts
+        self.entries: deque = deque()
+        self.total_bytes = 0
+        for stem in list_captures(directory):
+            size = sum(_size(os.path.join(directory, stem + ext)) for ext in (".bin", ".json"))
+            self.entries.append((stem, size))
+            self.total_bytes += size
+        self._evict()
+
+    def sampled(self) -> bool:
+        return self.rate >= 1 or random.random() < self.rate
+
+    def save(self, payload: bytes, meta: Dict[str, Any]):
+        """Write one capture, then trim the ring back under budget"""
+        with self.lock:
+            self.seq += 1
+            stem = f"{time.time_ns()}-{self.seq:06d}"
+        meta = {"id": stem, "captured_at": time.time(), **meta}
+        body = json.dumps(meta).encode()
+        base = os.path.join(self.directory, stem)
+        try:
+            with open(base + ".bin", "wb") as f:
+                f.write(payload)
+            # metadata last, via rename: a .json always has its complete .bin
+            with open(base + ".json.tmp", "wb") as f:
+                f.write(body)
+            os.replace(base + ".json.tmp", base + ".json")
+        except OSError:
+            for ext in (".bin", ".json.tmp"):
+                _remove(base + ext)
+            raise
+        with self.lock:
+            self.entries.append((stem, len(payload) + len(body)))
+            self.total_bytes += len(payload) + len(body)
+            self._evict()
+
+    def _evict(self):
+        while self.entries and (self.total_bytes > self.max_bytes
+                                or len(self.entries) > self.max_files):
+            stem, size = self.entries.popleft()
+            self.total_bytes -= size
+            for ext in (".bin", ".json"):
+                _remove(os.path.join(self.directory, stem + ext))
+
+def list_captures(directory: str) -> list:
+    """Stems of complete captures, oldest first"""
+    return sorted(name[:-5] for name in os.listdir(directory)
+                  if name.endswith(".json") and os.path.exists(os.path.join(directory, name[:-5] + ".bin")))
+
+def load_captures(directory: str) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+    """(metadata, payload) for every capture in the directory, oldest first"""
+    for stem in list_captures(directory):
+        base = os.path.join(directory, stem)
+        try:
+            with open(base + ".json") as f:
+                meta = json.load(f)
+            with open(base + ".bin", "rb") as f:
+                payload = f.read()
+        except (OSError, ValueError):
+            continue   # evicted or half-written while we were reading
+        yield meta, payload
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,202 @@
+# tuning_analytics.py
+"""Fixed-memory aggregates of /tune results for the admin dashboard.
+
+Nothing here keeps individual results: every metric is a counter or a
+fixed-bin histogram, so memory stays the same after ten tunings or ten
+million and percentiles are read straight from the bins.
+"""
+import math
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+import numpy as np
+
+class LinearHistogram:
+    """Equal-width bins over [lo, hi) plus underflow/overflow counts"""
+
+    def __init__(self, lo: float, hi: float, bins: int):
+        self.lo, self.hi, self.bins = lo, hi, bins
+        self.width = (hi - lo) / bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, x: float):
+        self.total += 1
+        self.sum += x
+        if x < self.lo:
+            self.under += 1
+        elif x >= self.hi:
+            self.over += 1
+        else:
+            self.counts[int((x - self.lo) / self.width)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q, interpolated within its bin (clamped to [lo, hi])"""
+        if self.total == 0:
+            return None
+        rank = q * (self.total - 1) + 1
+        if rank <= self.under:
+            return self.lo
+        cum = np.cumsum(self.counts) + self.under
+        i = int(np.searchsorted(cum, rank))
+        if i >= self.bins:
+            return self.hi
+        before = cum[i] - self.counts[i]
+        frac = (rank - before) / self.counts[i]
+        return float(self.lo + (i + frac) * self.width)
+
+    def summary(self, quantiles=(0.5, 0.9, 0.95, 0.99)) -> Dict[str, Any]:
+        return {
+            "count": self.total,
+            "mean": self.sum / self.total if self.total else None,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in quantiles},
+        }
+
+    def histogram(self) -> Dict[str, Any]:
+        return {"lo": self.lo, "hi": self.hi, "bin_width": self.width,
+                "underflow": self.under, "overflow": self.over,
+                "counts": self.counts.tolist()}
+
+class LogHistogram:
+    """Log-spaced bins (relative error ≤ `accuracy`) for positive, long-tailed values"""
+
+    def __init__(self, min_value: float, max_value: float, accuracy: float = 0.02):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_value, self.max_value = min_value, max_value
+        self.offset = math.floor(math.log(min_value) / self.log_gamma)
+        bins = math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1
+        self.hist = LinearHistogram(0, bins, bins)
+        self.sum = 0.0
+
+    def _index(self, x: float) -> int:
+        x = min(max(x, self.min_value), self.max_value)
+        return math.ceil(math.log(x) / self.log_gamma) - self.offset
+
+    def _value(self, index: float) -> float:
+        # midpoint (in relative terms) of the bin
+        return 2 * self.gamma ** (index + self.offset) / (self.gamma + 1)
+
+    def add(self, x: float):
+        self.hist.add(self._index(x))
+        self.sum += x
+
+    def quantile(self, q: float) -> Optional[float]:
+        idx = self.hist.quantile(q)
+        return None if idx is None else self._value(min(math.floor(idx), self.hist.bins - 1))
+
+    def summary(self, quantiles=(0.5, 0.9, 0.95, 0.99)) -> Dict[str, Any]:
+        total = self.hist.total
+        return {
+            "count": total,
+            "mean": self.sum / total if total else None,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in quantiles},
+        }
+
+    def histogram(self) -> Dict[str, Any]:
+        nz = np.nonzero(self.hist.counts)[0]
+        return {"buckets": [[self._value(int(i)), int(self.hist.counts[i])] for i in nz]}
+
+class NoteStats:
+    """Per-string counters plus a cents histogram"""
+
+    def __init__(self):
+        self.count = 0
+        self.in_tune = 0
+        self.sharp = 0
+        self.flat = 0
+        self.cents = LinearHistogram(-100, 100, 400)
+        self.abs_cents = LinearHistogram(0, 100, 200)
+
+    def add(self, cents: float, in_tune: bool):
+        self.count += 1
+        if in_tune:
+            self.in_tune += 1
+        elif cents > 0:
+            self.sharp += 1
+        else:
+            self.flat += 1
+        self.cents.add(cents)
+        self.abs_cents.add(abs(cents))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "in_tune": self.in_tune,
+            "sharp": self.sharp,
+            "flat": self.flat,
+            "out_of_tune_rate": (self.count - self.in_tune) / self.count if self.count else None,
+            "cents": self.cents.summary(),
+            "abs_cents": self.abs_cents.summary(),
+        }
+
+class TuningAnalytics:
+    """Thread-safe streaming aggregates over /tune outcomes"""
+
+    def __init__(self, bucket_seconds: int = 3600, buckets: int = 48):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.bucket_seconds = bucket_seconds
+        self.total = 0
+        self.no_pitch = 0
+        self.notes: Dict[str, NoteStats] = {}
+        self.cents = LinearHistogram(-100, 100, 400)
+        self.confidence = LinearHistogram(0, 1.0001, 100)
+        self.clarity = LinearHistogram(0, 1.0001, 100)
+        self.latency_ms = LogHistogram(0.1, 120_000)
+        # ring of (bucket start, {note: count}, no_pitch count) for the last `buckets` periods
+        self.timeline: deque = deque(maxlen=buckets)
+
+    def _bucket(self, now: float) -> List[Any]:
+        start = int(now // self.bucket_seconds) * self.bucket_seconds
+        if not self.timeline or self.timeline[-1][0] != start:
+            self.timeline.append([start, {}, 0])
+        return self.timeline[-1]
+
+    def record(self, note: Optional[str], cents: float = 0.0, in_tune: bool = False,
+               confidence: float = 0.0, clarity: float = 0.0, latency_ms: float = 0.0):
+        """Add one /tune outcome; note=None records a request with no clear pitch"""
+        with self.lock:
+            self.total += 1
+            self.latency_ms.add(latency_ms)
+            bucket = self._bucket(time.time())
+            if note is None:
+                self.no_pitch += 1
+                bucket[2] += 1
+                return
+            self.notes.setdefault(note, NoteStats()).add(cents, in_tune)
+            self.cents.add(cents)
+            self.confidence.add(confidence)
+            self.clarity.add(clarity)
+            bucket[1][note] = bucket[1].get(note, 0) + 1
+
+    def snapshot(self, histograms: bool = True) -> Dict[str, Any]:
+        with self.lock:
+            notes = {n: s.summary() for n, s in sorted(self.notes.items())}
+            ranked = sorted((n for n in notes if notes[n]["count"]),
+                            key=lambda n: notes[n]["out_of_tune_rate"], reverse=True)
+            out = {
+                "since": self.started_at,
+                "total": self.total,
+                "no_pitch": self.no_pitch,
+                "most_out_of_tune": ranked,
+                "notes": notes,
+                "cents": self.cents.summary(),
+                "confidence": self.confidence.summary(),
+                "clarity": self.clarity.summary(),
+                "latency_ms": self.latency_ms.summary(),
+                "timeline": [{"start": start, "bucket_seconds": self.bucket_seconds,
+                              "notes": dict(counts), "no_pitch": np_count}
+                             for start, counts, np_count in self.timeline],
+            }
+            if histograms:
+                out["histograms"] = {
+                    "cents": self.cents.histogram(),
+                    "confidence": self.confidence.histogram(),
+                    "latency_ms": self.latency_ms.histogram(),
+                }
+            return out